@@ -0,0 +1,37 @@
+"""
+Numba-compiled XOR kernel for the erasure-coding hot path.
+Imported optionally by algorithms.py; requires numba and numpy.
+"""
+
+import threading
+
+import numpy as np
+from numba import njit, prange
+
+# The default workqueue threading layer is not safe for concurrent callers,
+# and concurrent first calls can deadlock while compiling. The kernel already
+# spreads across all cores, so serializing entry costs nothing.
+_kernel_lock = threading.Lock()
+
+
+@njit(cache=True, parallel=True, boundscheck=False)
+def xor_into(out, a, b):
+    """Write a ^ b into out (uint8 arrays of equal length), in parallel chunks."""
+    for i in prange(a.shape[0]):
+        out[i] = a[i] ^ b[i]
+
+
+# Compile (or load from cache) and start numba's worker pool from the
+# importing thread; launching the pool first from a worker thread hangs the
+# interpreter at exit.
+_probe = np.frombuffer(b'\x00', dtype=np.uint8)
+xor_into(np.empty(1, dtype=np.uint8), _probe, _probe)
+del _probe
+
+
+def xor_bytes(a: bytes, b: bytes) -> bytes:
+    """XOR two equal-length buffers through the compiled kernel."""
+    out = np.empty(len(a), dtype=np.uint8)
+    with _kernel_lock:
+        xor_into(out, np.frombuffer(a, dtype=np.uint8), np.frombuffer(b, dtype=np.uint8))
+    return out.tobytes()
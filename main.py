@@ -5,19 +5,23 @@ from pydantic import BaseModel
 from typing import List, Optional
 import uuid
 import asyncio
-from datetime import datetime
+import httpx
+import logging
+import time
+from collections import defaultdict, OrderedDict
+from datetime import datetime, timezone
 import tempfile
 import os
-import zlib
-import io
 
 from storage_manager import SupabaseStorageManager
-from smart_engine import SmartStorageEngine
+from smart_engine import SmartStorageEngine, Decision
 from node_simulator import node_simulator
 from algorithms import (
     encode_with_replication,
     encode_with_reed_solomon,
     decode_file,
+    reed_solomon_recoverable,
+    compressobj,
     decompress_bytes
 )
 
@@ -36,10 +40,30 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+log = logging.getLogger("cosmeon")
+
 # Initialize managers
 storage = SupabaseStorageManager()
 engine = SmartStorageEngine()
 
+# Upload bodies are read, and reconstructed files sent, in chunks of this size
+UPLOAD_CHUNK_SIZE = 1 << 20
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+
+@app.on_event("startup")
+async def _open_http_client():
+    """Shared keep-alive client for shard probes, reused across requests"""
+    app.state.http = httpx.AsyncClient(
+        timeout=5.0,
+        http2=True,
+        limits=httpx.Limits(max_keepalive_connections=64, max_connections=128)
+    )
+
+@app.on_event("shutdown")
+async def _close_http_client():
+    await app.state.http.aclose()
+    await storage.aclose()
+
 # Response models
 class UploadResponse(BaseModel):
     file_id: str
@@ -75,44 +99,144 @@ async def health_check():
         "policies": ["balanced", "cost", "reliability", "eco"]
     }
 
+class _NodeUsageCache:
+    """Short-lived cache of per-node shard usage; writes bump the generation"""
+    
+    def __init__(self, ttl: float = 2.0):
+        self.ttl = ttl
+        self.generation = 0
+        self._entry = None  # (generation, timestamp, usage)
+    
+    def get(self) -> Optional[dict]:
+        entry = self._entry
+        if entry and entry[0] == self.generation and time.monotonic() - entry[1] < self.ttl:
+            return entry[2]
+        return None
+    
+    def put(self, generation: int, usage: dict):
+        # Usage computed before an invalidation is stale on arrival
+        if generation == self.generation:
+            self._entry = (generation, time.monotonic(), usage)
+    
+    def invalidate(self):
+        self.generation += 1
+        self._entry = None
+
+_node_usage_cache = _NodeUsageCache()
+
+# Simulated per-node capacities, assigned by node position
+CAPACITIES_GB = (45, 50, 55, 60, 48)
+CAPACITIES_BYTES = tuple(gb << 30 for gb in CAPACITIES_GB)
+
+_ts_cache = (0, "")
+
+def _utc_now_iso() -> str:
+    """UTC ISO timestamp at one-second resolution, formatted once per second"""
+    global _ts_cache
+    now = int(time.time())
+    if _ts_cache[0] != now:
+        _ts_cache = (now, datetime.fromtimestamp(now, timezone.utc).replace(tzinfo=None).isoformat())
+    return _ts_cache[1]
+
+class _MetadataCache:
+    """Per-file metadata with a TTL, LRU-bounded; invalidations bump the generation"""
+    
+    def __init__(self, ttl: float = 10.0, maxsize: int = 1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.generation = 0
+        self._entries = OrderedDict()  # file_id -> (timestamp, metadata)
+    
+    def get(self, file_id: str) -> Optional[dict]:
+        entry = self._entries.get(file_id)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] >= self.ttl:
+            self._entries.pop(file_id, None)
+            return None
+        self._entries.move_to_end(file_id)
+        return entry[1]
+    
+    def put(self, generation: int, file_id: str, metadata: dict):
+        # Metadata fetched before a delete must not be resurrected
+        if generation != self.generation:
+            return
+        self._entries[file_id] = (time.monotonic(), metadata)
+        self._entries.move_to_end(file_id)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+    
+    def pop(self, file_id: str):
+        self.generation += 1
+        self._entries.pop(file_id, None)
+    
+    def clear(self):
+        self.generation += 1
+        self._entries.clear()
+
+_metadata_cache = _MetadataCache()
+
+def _get_metadata(file_id: str) -> Optional[dict]:
+    """storage.get_metadata behind the TTL cache; misses are not cached"""
+    metadata = _metadata_cache.get(file_id)
+    if metadata is None:
+        generation = _metadata_cache.generation
+        metadata = storage.get_metadata(file_id)
+        if metadata:
+            _metadata_cache.put(generation, file_id, metadata)
+    return metadata
+
+def _aggregate_node_usage(all_files: List[dict]) -> dict:
+    """Single pass over all files: bucket -> (used_bytes, files_count)"""
+    used = defaultdict(int)
+    files_count = defaultdict(int)
+    for file_data in all_files:
+        shards = file_data.get("shards", [])
+        
+        # Ensure shards is a list
+        if not isinstance(shards, list):
+            continue
+        
+        # A file counts once per node however many of its shards live there
+        on_nodes = set()
+        for shard in shards:
+            if not isinstance(shard, dict):
+                continue
+            
+            shard_size = shard.get("size", 0)
+            if isinstance(shard_size, (int, float)) and shard_size > 0:
+                bucket = shard.get("bucket", "")
+                used[bucket] += int(shard_size)
+                on_nodes.add(bucket)
+        for bucket in on_nodes:
+            files_count[bucket] += 1
+    return {bucket: (used[bucket], files_count[bucket]) for bucket in used}
+
 @app.get("/nodes/status", response_model=NodeStatusResponse, tags=["Nodes"])
 async def get_nodes_status():
     """Get status and health of all storage nodes"""
     status = storage.get_bucket_status()
     
-    # Get all files to calculate actual usage
-    all_files = storage.list_files_metadata()
+    # Per-node usage, aggregated from all file metadata (cached briefly)
+    usage = _node_usage_cache.get()
+    if usage is None:
+        generation = _node_usage_cache.generation
+        usage = _aggregate_node_usage(storage.list_files_metadata())
+        _node_usage_cache.put(generation, usage)
     
+    # One snapshot of simulated failures instead of a locked lookup per field
+    failed_nodes = node_simulator.get_failed_nodes()
+    checked_at = _utc_now_iso()
     nodes = []
     
     for i, (bucket_name, info) in enumerate(status.items()):
-        # Calculate actual storage usage for this node
-        used_bytes = 0
-        files_on_node = set()  # Use set to count unique files
+        used_bytes, files_count = usage.get(bucket_name, (0, 0))
+        failed = bucket_name in failed_nodes
         
-        for file_data in all_files:
-            file_id = file_data.get("id", "unknown")
-            shards = file_data.get("shards", [])
-            
-            # Ensure shards is a list
-            if not isinstance(shards, list):
-                continue
-            
-            for shard in shards:
-                if not isinstance(shard, dict):
-                    continue
-                    
-                shard_bucket = shard.get("bucket", "")
-                
-                if shard_bucket == bucket_name:
-                    shard_size = shard.get("size", 0)
-                    if isinstance(shard_size, (int, float)) and shard_size > 0:
-                        used_bytes += int(shard_size)
-                        files_on_node.add(file_id)
-        
-        # Simulate different capacity sizes for variety
-        capacity_gb = [45, 50, 55, 60, 48][i % 5]  # Different capacities per node
-        capacity_bytes = capacity_gb * 1024 * 1024 * 1024
+        # Simulate different capacity sizes for variety, keyed by node position
+        slot = i % len(CAPACITIES_GB)
+        capacity_gb = CAPACITIES_GB[slot]  # Different capacities per node
+        capacity_bytes = CAPACITIES_BYTES[slot]
         
         # Calculate utilization percentage with better precision for small values
         utilization_percent = (used_bytes / capacity_bytes * 100) if capacity_bytes > 0 else 0
@@ -127,15 +251,15 @@ async def get_nodes_status():
         
         nodes.append({
             "node_id": bucket_name,
-            "status": "offline" if node_simulator.is_node_failed(bucket_name) else info["status"],
-            "files_count": len(files_on_node) if not node_simulator.is_node_failed(bucket_name) else 0,
+            "status": "offline" if failed else info["status"],
+            "files_count": files_count if not failed else 0,
             "capacity_gb": capacity_gb,
             "capacity_bytes": capacity_bytes,
-            "used_bytes": used_bytes if not node_simulator.is_node_failed(bucket_name) else 0,
-            "utilization_percent": utilization_display if not node_simulator.is_node_failed(bucket_name) else 0,
-            "available_bytes": capacity_bytes if node_simulator.is_node_failed(bucket_name) else capacity_bytes - used_bytes,
-            "last_checked": datetime.utcnow().isoformat(),
-            "simulated_failure": node_simulator.is_node_failed(bucket_name)
+            "used_bytes": used_bytes if not failed else 0,
+            "utilization_percent": utilization_display if not failed else 0,
+            "available_bytes": capacity_bytes if failed else capacity_bytes - used_bytes,
+            "last_checked": checked_at,
+            "simulated_failure": failed
         })
     
     return NodeStatusResponse(
@@ -193,31 +317,40 @@ async def upload_file(
     except Exception:
         pass
 
-    # Read and validate file
-    contents = await file.read()
-    if not contents:
+    file_size = _upload_size(file)
+    if not file_size:
         raise HTTPException(400, "Empty file uploaded")
     
-    file_size = len(contents)
     file_id = str(uuid.uuid4())
     
     # Analyze file characteristics
-    metadata = engine.analyze_file(file.filename or "unknown")
-    metadata.size = file_size
+    metadata = engine.analyze_file(file.filename or "unknown", size=file_size)
     
     # Process algorithm selection
     decision = _process_algorithm_selection(algorithm, metadata, policy)
     
-    # Apply compression if needed
-    if decision["config"].get("compress"):
-        contents = zlib.compress(contents)
-        file_size = len(contents)
+    # Read the upload in fixed-size chunks (UploadFile already spools large
+    # bodies to disk), compressing each chunk as it is read if needed so the
+    # uncompressed payload is never held in memory. CPU-bound work runs off
+    # the event loop.
+    config = decision["config"]
+    compressor = compressobj(config.get("compress_level")) if config.get("compress") else None
+    chunks = []
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        if compressor is not None:
+            chunk = await asyncio.to_thread(compressor.compress, chunk)
+        chunks.append(chunk)
+    if compressor is not None:
+        chunks.append(compressor.flush())
+    contents = b"".join(chunks)
+    chunks.clear()
+    file_size = len(contents)
 
     # Encode file into shards
-    shard_data_list = _encode_file(contents, decision)
+    shard_data_list = await asyncio.to_thread(_encode_file, contents, decision)
     
     # Distribute shards across storage nodes
-    shard_metadata = _distribute_shards(shard_data_list, file_id)
+    shard_metadata = await _distribute_shards(shard_data_list, file_id)
     
     # Store metadata in database
     full_metadata = {
@@ -232,6 +365,7 @@ async def upload_file(
     
     if not storage.store_metadata(file_id, full_metadata):
         raise HTTPException(500, "Failed to store file metadata")
+    _node_usage_cache.invalidate()
     
     # Calculate failure tolerance
     can_survive = _calculate_failure_tolerance(decision)
@@ -244,7 +378,16 @@ async def upload_file(
         can_survive_failures=can_survive
     )
 
-def _process_algorithm_selection(algorithm: Optional[str], metadata, policy: str) -> dict:
+def _upload_size(file: UploadFile) -> int:
+    """Size of the spooled upload body, without reading it"""
+    if file.size is not None:
+        return file.size
+    file.file.seek(0, os.SEEK_END)
+    size = file.file.tell()
+    file.file.seek(0)
+    return size
+
+def _process_algorithm_selection(algorithm: Optional[str], metadata, policy: str) -> Decision:
     """Process algorithm selection and return decision"""
     compress_flag = False
     
@@ -266,16 +409,17 @@ def _process_algorithm_selection(algorithm: Optional[str], metadata, policy: str
         if compress_flag:
             config["compress"] = True
         
-        return {
-            "algorithm": algorithm,
-            "config": config,
-            "reasoning": f"User specified {algorithm}",
-            "cost_estimate": engine._estimate_cost(algorithm, metadata, compress=config.get("compress", False))
-        }
+        return Decision(
+            algorithm=algorithm,
+            config=config,
+            cost_estimate=engine._estimate_cost(algorithm, metadata, compress=config.get("compress", False)),
+            metadata=metadata,
+            reasoning_format="User specified {algorithm}"
+        )
     else:
         return engine.select_algorithm(metadata, policy)
 
-def _encode_file(contents: bytes, decision: dict) -> List[bytes]:
+def _encode_file(contents: bytes, decision: Decision) -> List[bytes]:
     """Encode file into shards based on algorithm"""
     algorithm = decision["algorithm"]
     config = decision["config"]
@@ -289,40 +433,19 @@ def _encode_file(contents: bytes, decision: dict) -> List[bytes]:
     else:
         raise HTTPException(400, f"Unknown algorithm: {algorithm}")
 
-def _distribute_shards(shard_data_list: List[bytes], file_id: str) -> List[dict]:
+async def _distribute_shards(shard_data_list: List[bytes], file_id: str) -> List[dict]:
     """Distribute shards across storage nodes (one shard per node for Reed-Solomon)"""
-    shard_metadata = []
+    buckets = storage._buckets_tuple
     
-    # For Reed-Solomon (3,2), we should have exactly 5 shards
-    if len(shard_data_list) == 5 and len(storage.buckets) >= 5:
-        # Distribute one shard per node for optimal fault tolerance
-        for i, shard_data in enumerate(shard_data_list):
-            bucket_name = storage.buckets[i]  # Use node i for shard i
-            
-            shard_info = storage.upload_shard(
-                bucket_name=bucket_name,
-                shard_data=shard_data,
-                file_id=file_id,
-                shard_index=i
-            )
-            shard_metadata.append(shard_info)
-    else:
-        # Fallback to round-robin distribution for other cases
-        for i, shard_data in enumerate(shard_data_list):
-            bucket_index = i % len(storage.buckets)
-            bucket_name = storage.buckets[bucket_index]
-            
-            shard_info = storage.upload_shard(
-                bucket_name=bucket_name,
-                shard_data=shard_data,
-                file_id=file_id,
-                shard_index=i
-            )
-            shard_metadata.append(shard_info)
-    
-    return shard_metadata
+    # Round-robin placement; with 5 Reed-Solomon (3,2) shards and at least 5
+    # nodes this puts shard i on node i for optimal fault tolerance.
+    # Uploads run concurrently and come back in shard order.
+    return await storage.upload_shards_many([
+        (buckets[i % len(buckets)], shard_data, file_id, i)
+        for i, shard_data in enumerate(shard_data_list)
+    ])
 
-def _calculate_failure_tolerance(decision: dict) -> int:
+def _calculate_failure_tolerance(decision: Decision) -> int:
     """Calculate how many node failures the file can survive"""
     algorithm = decision["algorithm"]
     config = decision["config"]
@@ -339,40 +462,73 @@ async def list_files():
     """List all uploaded files with metadata"""
     return storage.list_files_metadata()
 
+async def _probe_shard(client: httpx.AsyncClient, shard: dict) -> bool:
+    """HEAD a single shard URL; True if it is reachable"""
+    try:
+        response = await client.head(shard["url"])
+        return response.status_code == 200
+    except Exception:
+        return False
+
+async def _probe_shards(file_id: str, shards: List[dict], failed_nodes) -> List[bool]:
+    """Check all shards with one listing per bucket, skipping failed nodes.
+    
+    Only shards the listing returned are trusted; the rest are HEAD-probed
+    concurrently over the shared client.
+    """
+    results = [False] * len(shards)
+    live = [i for i, shard in enumerate(shards) if shard.get("bucket", "") not in failed_nodes]
+    if not live:
+        return results
+    
+    listed = await storage.probe_shards(file_id, [shards[i] for i in live])
+    unlisted = []
+    for i in live:
+        key = (shards[i].get("bucket", ""), shards[i].get("filename"))
+        if key in listed:
+            results[i] = listed[key]
+        else:
+            unlisted.append(i)
+    
+    if unlisted:
+        client = app.state.http
+        probed = await asyncio.gather(*[_probe_shard(client, shards[i]) for i in unlisted])
+        for i, online in zip(unlisted, probed):
+            results[i] = online
+    return results
+
+def _shards_recoverable(algorithm: str, indices, needed_shards: int) -> bool:
+    """Whether the given shard indices suffice to reconstruct; for the XOR layout not every k-of-n subset does"""
+    if algorithm == "reed-solomon":
+        return reed_solomon_recoverable(indices, needed_shards)
+    return len(indices) >= needed_shards
+
 @app.get("/file/{file_id}/status", response_model=FileStatusResponse, tags=["Files"])
 async def get_file_status(file_id: str):
     """Get detailed status and health of a specific file"""
-    metadata = storage.get_metadata(file_id)
+    metadata = _get_metadata(file_id)
     if not metadata:
         raise HTTPException(404, f"File {file_id} not found")
     
     # Check shard availability (considering simulated failures)
+    failed_nodes = node_simulator.get_failed_nodes()
+    probes = await _probe_shards(file_id, metadata["shards"], failed_nodes)
+    
     shard_status = []
-    for shard in metadata["shards"]:
+    online_indices = []
+    for i, (shard, online) in enumerate(zip(metadata["shards"], probes)):
         shard_bucket = shard.get("bucket", "")
-        
-        # Check if node is simulated as failed
-        if node_simulator.is_node_failed(shard_bucket):
-            status = "offline"
-        else:
-            try:
-                import httpx
-                async with httpx.AsyncClient(timeout=5.0) as client:
-                    response = await client.head(shard["url"])
-                    status = "online" if response.status_code == 200 else "offline"
-            except:
-                status = "offline"
-        
+        if online:
+            online_indices.append(i)
         shard_status.append({
             "shard_index": shard["shard_index"],
             "bucket": shard["bucket"],
-            "status": status,
+            "status": "online" if online else "offline",
             "size": shard.get("size", 0),
-            "simulated_failure": node_simulator.is_node_failed(shard_bucket)
+            "simulated_failure": shard_bucket in failed_nodes
         })
     
     # Calculate health metrics
-    online_shards = sum(1 for s in shard_status if s["status"] == "online")
     algorithm = metadata.get("algorithm_used") or metadata.get("algorithm")
     config = metadata.get("algorithm_config") or metadata.get("config", {})
     
@@ -383,7 +539,8 @@ async def get_file_status(file_id: str):
     else:
         needed = 1
     
-    reconstructable = online_shards >= needed
+    online_shards = len(online_indices)
+    reconstructable = _shards_recoverable(algorithm, online_indices, needed)
     if reconstructable:
         health = "healthy"
     elif online_shards > 0:
@@ -401,43 +558,69 @@ async def get_file_status(file_id: str):
         reconstructable=reconstructable,
         health=health
     )
+async def _download_shard(index: int, shard_info: dict):
+    """Download one shard over the pooled client; returns (index, data or None)"""
+    try:
+        return index, await storage.download_shard_async(shard_info["url"])
+    except Exception as e:
+        log.warning("Failed to download shard %d from %s: %s", index, shard_info.get("bucket", ""), e)
+        return index, None
+
+async def _chunk_iter(data: bytes, chunk_size: int):
+    """Yield data in chunk_size pieces so the response starts without a second full copy"""
+    for start in range(0, len(data), chunk_size):
+        yield data[start:start + chunk_size]
+
 @app.get("/file/{file_id}/reconstruct", tags=["Files"])
 async def reconstruct_file(file_id: str, background_tasks: BackgroundTasks):
     """Reconstruct and download a file from distributed shards"""
-    from fastapi.responses import StreamingResponse
-    import io
-    
-    metadata = storage.get_metadata(file_id)
+    metadata = _get_metadata(file_id)
     if not metadata:
         raise HTTPException(404, f"File {file_id} not found")
     
-    # Download available shards (skip failed nodes)
-    shard_data_list = []
-    missing_indices = []
+    algorithm = metadata.get("algorithm_used") or metadata.get("algorithm")
+    config = metadata.get("algorithm_config") or metadata.get("config", {})
+    needed = config.get("k", 3) if algorithm == "reed-solomon" else 1
     
-    for i, shard_info in enumerate(metadata["shards"]):
+    # Download available shards concurrently (skip failed nodes)
+    shards = metadata["shards"]
+    failed_nodes = node_simulator.get_failed_nodes()
+    downloaded = {}
+    tasks = []
+    
+    for i, shard_info in enumerate(shards):
         shard_bucket = shard_info.get("bucket", "")
         
         # Check if this shard's node is simulated as failed
-        if node_simulator.is_node_failed(shard_bucket):
-            missing_indices.append(i)
-            shard_data_list.append((i, None))
-            print(f"[SIMULATOR] Skipping shard {i} - node {shard_bucket} is simulated as failed")
+        if shard_bucket in failed_nodes:
+            log.debug("[SIMULATOR] Skipping shard %d - node %s is simulated as failed", i, shard_bucket)
             continue
         
-        try:
-            shard_data = storage.download_shard(shard_info["url"])
-            shard_data_list.append((i, shard_data))
-        except Exception as e:
-            print(f"[ERROR] Failed to download shard {i} from {shard_bucket}: {e}")
-            missing_indices.append(i)
-            shard_data_list.append((i, None))
+        tasks.append(asyncio.create_task(_download_shard(i, shard_info)))
+    
+    # Stop as soon as the shards in hand are enough to rebuild the file;
+    # the remaining downloads are cancelled
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            idx, shard_data = await next_done
+            if shard_data is None:
+                continue
+            downloaded[idx] = shard_data
+            if _shards_recoverable(algorithm, downloaded, needed):
+                break
+    finally:
+        for task in tasks:
+            task.cancel()
+    
+    # Decoding an unrecoverable set only burns a worker thread before failing
+    if not _shards_recoverable(algorithm, downloaded, needed):
+        raise HTTPException(500, f"Reconstruction failed: not enough shards available "
+                                 f"(have {sorted(downloaded)})")
+    
+    shard_data_list = [(i, downloaded.get(i)) for i in range(len(shards))]
     
     # Reconstruct file
     try:
-        algorithm = metadata.get("algorithm_used") or metadata.get("algorithm")
-        config = metadata.get("algorithm_config") or metadata.get("config", {})
-        
         if algorithm == "replication":
             # Use any available shard
             reconstructed = None
@@ -452,7 +635,8 @@ async def reconstruct_file(file_id: str, background_tasks: BackgroundTasks):
             k = config.get("k", 3)
             m = config.get("m", 2)
             original_size = metadata.get("original_size", 0)
-            reconstructed = decode_file(
+            reconstructed = await asyncio.to_thread(
+                decode_file,
                 shard_data_list, 
                 algorithm="reed-solomon", 
                 k=k, m=m, 
@@ -463,17 +647,14 @@ async def reconstruct_file(file_id: str, background_tasks: BackgroundTasks):
         
         # Decompress if needed
         if config.get("compress"):
-            reconstructed = decompress_bytes(reconstructed)
+            reconstructed = await asyncio.to_thread(decompress_bytes, reconstructed)
 
-        # Create a file-like object from the reconstructed data
-        file_like = io.BytesIO(reconstructed)
-        
         # Get the original filename
         filename = metadata.get("filename", f"reconstructed_{file_id}")
         
         # Return the file as a streaming download
         return StreamingResponse(
-            io.BytesIO(reconstructed),
+            _chunk_iter(reconstructed, DOWNLOAD_CHUNK_SIZE),
             media_type="application/octet-stream",
             headers={
                 "Content-Disposition": f"attachment; filename=\"{filename}\"",
@@ -485,36 +666,18 @@ async def reconstruct_file(file_id: str, background_tasks: BackgroundTasks):
         raise HTTPException(500, f"Reconstruction failed: {str(e)}")
 
 @app.get("/file/{file_id}/reconstruct-info", tags=["Files"])
-async def get_reconstruct_info(file_id: str):
-    """Get reconstruction information without downloading the file"""
-    metadata = storage.get_metadata(file_id)
+async def get_reconstruct_info(file_id: str, exact: bool = True):
+    """Get reconstruction information without downloading the file.
+    
+    With exact=false, only as many shards as reconstruction needs are probed
+    at first; if they form a recoverable set and are all online the answer is
+    returned with partial_probe=true and an empty missing_shards list.
+    """
+    metadata = _get_metadata(file_id)
     if not metadata:
         raise HTTPException(404, f"File {file_id} not found")
     
-    # Check shard availability
-    missing_indices = []
-    available_shards = 0
-    
-    for i, shard_info in enumerate(metadata["shards"]):
-        shard_bucket = shard_info.get("bucket", "")
-        
-        # Check if this shard's node is simulated as failed
-        if node_simulator.is_node_failed(shard_bucket):
-            missing_indices.append(i)
-        else:
-            try:
-                # Quick check if shard is accessible
-                import httpx
-                async with httpx.AsyncClient(timeout=5.0) as client:
-                    response = await client.head(shard_info["url"])
-                    if response.status_code == 200:
-                        available_shards += 1
-                    else:
-                        missing_indices.append(i)
-            except:
-                missing_indices.append(i)
-    
-    # Determine if reconstruction is possible
+    # Determine how many shards reconstruction needs
     algorithm = metadata.get("algorithm_used") or metadata.get("algorithm")
     config = metadata.get("algorithm_config") or metadata.get("config", {})
     
@@ -525,48 +688,104 @@ async def get_reconstruct_info(file_id: str):
     else:
         needed_shards = 1
     
-    can_reconstruct = available_shards >= needed_shards
+    # Shards on simulated-failed nodes are not probed at all
+    shards = metadata["shards"]
+    failed_nodes = node_simulator.get_failed_nodes()
+    
+    partial_probe = False
+    if not exact:
+        first = [i for i, shard in enumerate(shards) if shard.get("bucket", "") not in failed_nodes][:needed_shards]
+        if len(first) == needed_shards and _shards_recoverable(algorithm, first, needed_shards):
+            partial_probe = all(await _probe_shards(file_id, [shards[i] for i in first], failed_nodes))
+    
+    # Check shard availability
+    missing_indices = []
+    
+    if partial_probe:
+        available_shards = needed_shards
+        can_reconstruct = True
+    else:
+        probes = await _probe_shards(file_id, shards, failed_nodes)
+        online_indices = []
+        for i, online in enumerate(probes):
+            if online:
+                online_indices.append(i)
+            else:
+                missing_indices.append(i)
+        available_shards = len(online_indices)
+        can_reconstruct = _shards_recoverable(algorithm, online_indices, needed_shards)
     
     return {
         "file_id": file_id,
         "filename": metadata.get("filename", "unknown"),
         "algorithm": algorithm,
-        "total_shards": len(metadata["shards"]),
+        "total_shards": len(shards),
         "available_shards": available_shards,
         "missing_shards": missing_indices,
         "needed_shards": needed_shards,
         "can_reconstruct": can_reconstruct,
+        "partial_probe": partial_probe,
         "original_size": metadata.get("original_size", 0),
         "download_url": f"/file/{file_id}/reconstruct"
     }
 
+# Shard deletes: concurrent storage calls in flight, and paths per bulk remove
+DELETE_CONCURRENCY = 32
+REMOVE_BATCH_SIZE = 1000
+
+async def _run_limited(sem: asyncio.Semaphore, func, *args):
+    """Run a blocking storage call in a worker thread, bounded by sem"""
+    async with sem:
+        return await asyncio.to_thread(func, *args)
+
+def _shard_batches(shards: List[dict]) -> List[tuple]:
+    """Group shard paths by bucket into (bucket, [paths]) bulk-remove batches"""
+    by_bucket = defaultdict(list)
+    for shard in shards:
+        bucket = shard.get("bucket")
+        filename = shard.get("filename")
+        if bucket and filename:
+            by_bucket[bucket].append(f"shards/{filename}")
+    return [
+        (bucket, paths[i:i + REMOVE_BATCH_SIZE])
+        for bucket, paths in by_bucket.items()
+        for i in range(0, len(paths), REMOVE_BATCH_SIZE)
+    ]
+
+async def _delete_shard_batches(sem: asyncio.Semaphore, batches: List[tuple]):
+    """Bulk-remove all batches concurrently; returns (deleted_count, [(bucket, paths, error)])"""
+    results = await asyncio.gather(
+        *[_run_limited(sem, storage.delete_shards, bucket, paths) for bucket, paths in batches],
+        return_exceptions=True
+    )
+    deleted = 0
+    failures = []
+    for (bucket, paths), result in zip(batches, results):
+        if result is True:
+            deleted += len(paths)
+        else:
+            error = str(result) if isinstance(result, BaseException) else "delete failed"
+            failures.append((bucket, paths, error))
+    return deleted, failures
+
 @app.delete("/file/{file_id}", tags=["Files"])
 async def delete_file(file_id: str):
     """Delete a specific file and all its shards"""
-    metadata = storage.get_metadata(file_id)
+    metadata = _get_metadata(file_id)
     if not metadata:
         raise HTTPException(404, f"File {file_id} not found")
     
-    deleted_count = 0
     errors = []
+    sem = asyncio.Semaphore(DELETE_CONCURRENCY)
 
-    # Delete shards
-    for shard in metadata.get("shards", []):
-        try:
-            bucket = shard.get("bucket")
-            filename = shard.get("filename")
-            if bucket and filename:
-                success = storage.delete_shard(bucket, f"shards/{filename}")
-                if success:
-                    deleted_count += 1
-                else:
-                    errors.append(f"Failed to delete shard {filename}")
-        except Exception as e:
-            errors.append(f"Error deleting shard: {str(e)}")
+    # Delete shards, one bulk remove per bucket
+    deleted_count, failures = await _delete_shard_batches(sem, _shard_batches(metadata.get("shards", [])))
+    for bucket, paths, error in failures:
+        errors.append(f"Failed to delete {len(paths)} shard(s) from {bucket}: {error}")
 
     # Delete any remaining shards
     try:
-        extra_deleted = storage.delete_shards_by_file_id(file_id)
+        extra_deleted = await _run_limited(sem, storage.delete_shards_by_file_id, file_id)
         deleted_count += extra_deleted
     except Exception as e:
         errors.append(f"Error in cleanup: {str(e)}")
@@ -576,6 +795,8 @@ async def delete_file(file_id: str):
         storage.delete_metadata(file_id)
     except Exception as e:
         errors.append(f"Error deleting metadata: {str(e)}")
+    _metadata_cache.pop(file_id)
+    _node_usage_cache.invalidate()
 
     return {
         "file_id": file_id,
@@ -594,45 +815,36 @@ async def delete_all_files():
         "shards_deleted": 0,
         "errors": []
     }
+    sem = asyncio.Semaphore(DELETE_CONCURRENCY)
+    file_ids = [f.get("id") for f in all_files if f.get("id")]
+
+    # Delete shards of every file, batched per bucket across files
+    shards = [shard for f in all_files if f.get("id") for shard in f.get("shards", [])]
+    deleted, failures = await _delete_shard_batches(sem, _shard_batches(shards))
+    report["shards_deleted"] += deleted
+    for bucket, paths, error in failures:
+        report["errors"].append({"bucket": bucket, "shards": len(paths), "error": error})
+
+    # Cleanup any remaining shards, then the metadata, concurrently per file
+    cleanups = await asyncio.gather(
+        *[_run_limited(sem, storage.delete_shards_by_file_id, fid) for fid in file_ids],
+        return_exceptions=True
+    )
+    removals = await asyncio.gather(
+        *[_run_limited(sem, storage.delete_metadata, fid) for fid in file_ids],
+        return_exceptions=True
+    )
+    for file_id, cleanup, removal in zip(file_ids, cleanups, removals):
+        if isinstance(cleanup, BaseException):
+            report["errors"].append({"file_id": file_id, "error": str(cleanup)})
+        else:
+            report["shards_deleted"] += cleanup
+        if isinstance(removal, BaseException):
+            report["errors"].append({"file_id": file_id, "error": str(removal)})
+        report["deleted_files"] += 1
 
-    for file_entry in all_files:
-        try:
-            file_id = file_entry.get("id")
-            if not file_id:
-                continue
-
-            # Delete shards
-            deleted_shards = 0
-            for shard in file_entry.get("shards", []):
-                try:
-                    bucket = shard.get("bucket")
-                    filename = shard.get("filename")
-                    if bucket and filename:
-                        success = storage.delete_shard(bucket, f"shards/{filename}")
-                        if success:
-                            deleted_shards += 1
-                except Exception as e:
-                    report["errors"].append({"file_id": file_id, "error": str(e)})
-
-            # Cleanup any remaining shards
-            try:
-                extra_deleted = storage.delete_shards_by_file_id(file_id)
-                deleted_shards += extra_deleted
-            except Exception as e:
-                report["errors"].append({"file_id": file_id, "error": str(e)})
-
-            # Delete metadata
-            try:
-                storage.delete_metadata(file_id)
-            except Exception as e:
-                report["errors"].append({"file_id": file_id, "error": str(e)})
-
-            report["deleted_files"] += 1
-            report["shards_deleted"] += deleted_shards
-
-        except Exception as e:
-            report["errors"].append({"file_entry": file_entry, "error": str(e)})
-
+    _metadata_cache.clear()
+    _node_usage_cache.invalidate()
     return report
 
 async def cleanup_temp_file(filepath: str):
@@ -645,5 +857,21 @@ async def cleanup_temp_file(filepath: str):
         pass
 
 if __name__ == "__main__":
+    import importlib.util
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    
+    # uvloop/httptools come with uvicorn[standard]; uvloop is unavailable on Windows.
+    # Node failure simulation and the usage cache are per process, so extra
+    # workers are opt-in.
+    workers = int(os.getenv("COSMEON_WORKERS", "1"))
+    log_level = os.getenv("COSMEON_LOG_LEVEL", "warning")
+    logging.basicConfig(level=log_level.upper())
+    uvicorn.run(
+        "main:app" if workers > 1 else app,
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        http="httptools" if importlib.util.find_spec("httptools") else "h11",
+        workers=workers,
+        log_level=log_level
+    )
\ No newline at end of file
@@ -3,15 +3,20 @@ Node failure simulation system for COSMEON distributed storage.
 Manages simulated node failures that affect API responses and file reconstruction.
 """
 
-from typing import Set, Dict, Any
+from typing import FrozenSet, Dict, Any
 from datetime import datetime
+import logging
 import threading
 
+log = logging.getLogger("cosmeon")
+
 class NodeFailureSimulator:
     """Manages simulated node failures across the system"""
     
     def __init__(self):
-        self._failed_nodes: Set[str] = set()
+        # Copy-on-write: writers swap in a new frozenset under the lock, so
+        # readers can test membership without locking (attribute reads are atomic)
+        self._failed_nodes: FrozenSet[str] = frozenset()
         self._lock = threading.Lock()
         self._failure_history: Dict[str, datetime] = {}
     
@@ -19,9 +24,9 @@ class NodeFailureSimulator:
         """Simulate a node failure"""
         with self._lock:
             if node_id not in self._failed_nodes:
-                self._failed_nodes.add(node_id)
+                self._failed_nodes = self._failed_nodes | {node_id}
                 self._failure_history[node_id] = datetime.utcnow()
-                print(f"[SIMULATOR] Node {node_id} marked as FAILED")
+                log.info("[SIMULATOR] Node %s marked as FAILED", node_id)
                 return True
             return False
     
@@ -29,27 +34,25 @@ class NodeFailureSimulator:
         """Restore a failed node"""
         with self._lock:
             if node_id in self._failed_nodes:
-                self._failed_nodes.remove(node_id)
+                self._failed_nodes = self._failed_nodes - {node_id}
                 if node_id in self._failure_history:
                     del self._failure_history[node_id]
-                print(f"[SIMULATOR] Node {node_id} RESTORED")
+                log.info("[SIMULATOR] Node %s RESTORED", node_id)
                 return True
             return False
     
     def is_node_failed(self, node_id: str) -> bool:
         """Check if a node is currently failed"""
-        with self._lock:
-            return node_id in self._failed_nodes
+        return node_id in self._failed_nodes
     
-    def get_failed_nodes(self) -> Set[str]:
-        """Get all currently failed nodes"""
-        with self._lock:
-            return self._failed_nodes.copy()
+    def get_failed_nodes(self) -> FrozenSet[str]:
+        """Get all currently failed nodes (an immutable snapshot)"""
+        return self._failed_nodes
     
     def get_online_nodes(self, all_nodes: list) -> list:
         """Filter out failed nodes from a list of all nodes"""
-        with self._lock:
-            return [node for node in all_nodes if node not in self._failed_nodes]
+        failed_nodes = self._failed_nodes
+        return [node for node in all_nodes if node not in failed_nodes]
     
     def get_failure_info(self) -> Dict[str, Any]:
         """Get detailed failure information"""
@@ -67,10 +70,10 @@ class NodeFailureSimulator:
         """Clear all simulated failures"""
         with self._lock:
             count = len(self._failed_nodes)
-            self._failed_nodes.clear()
+            self._failed_nodes = frozenset()
             self._failure_history.clear()
-            print(f"[SIMULATOR] Cleared {count} simulated failures")
+            log.info("[SIMULATOR] Cleared %d simulated failures", count)
             return count
 
 # Global instance
-node_simulator = NodeFailureSimulator()
\ No newline at end of file
+node_simulator = NodeFailureSimulator()
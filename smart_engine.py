@@ -2,13 +2,18 @@
 Smart Storage Engine for intelligent algorithm selection and file analysis.
 """
 
+import functools
+import sys
 from dataclasses import dataclass
-from typing import Dict, Any, Optional
+from typing import Dict, Any
 
+# dataclass(slots=True) needs Python 3.10+; older interpreters keep __dict__
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
 
-@dataclass
+
+@dataclass(frozen=True, **_SLOTS)
 class FileMetadata:
-    """Metadata about a file for algorithm selection."""
+    """Metadata about a file for algorithm selection (immutable, hashable)."""
     filename: str
     extension: str
     size: int = 0
@@ -28,6 +33,39 @@ class FileMetadata:
         }
 
 
+@dataclass(**_SLOTS)
+class Decision:
+    """Algorithm decision; supports dict-style reads, reasoning is formatted on access."""
+    algorithm: str
+    config: Dict[str, Any]
+    cost_estimate: float
+    metadata: FileMetadata
+    reasoning_format: str = "{algorithm}"
+    
+    _KEYS = ("algorithm", "config", "reasoning", "cost_estimate")
+    
+    @property
+    def reasoning(self) -> str:
+        """Human-readable explanation of the decision."""
+        return self.reasoning_format.format(
+            algorithm=self.algorithm,
+            filename=self.metadata.filename,
+            size=self.metadata.size,
+        )
+    
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in self._KEYS else default
+    
+    def get_dict(self) -> Dict[str, Any]:
+        """Convert to the plain decision dict."""
+        return {key: getattr(self, key) for key in self._KEYS}
+
+
 class SmartStorageEngine:
     """
     Intelligent storage algorithm selector based on file characteristics and policies.
@@ -40,48 +78,86 @@ class SmartStorageEngine:
     }
     
     # Compressible file extensions
-    COMPRESSIBLE_EXTENSIONS = {
+    COMPRESSIBLE_EXTENSIONS = frozenset({
         "txt", "json", "xml", "csv", "log", "sql", "html", "css", "js", 
         "py", "java", "cpp", "c", "h", "pdf", "doc", "docx", "xlsx"
-    }
+    })
     
     # Critical file extensions (high redundancy needed)
-    CRITICAL_EXTENSIONS = {
+    CRITICAL_EXTENSIONS = frozenset({
         "db", "sqlite", "iso", "tar", "zip", "7z", "rar", "vmdk", "vdi"
-    }
+    })
+    
+    # extension -> (is_compressible, is_critical), precomputed so analyze_file
+    # does one dict probe; unknown extensions are neither
+    _EXT_CLASSES = {}
+    for _ext in COMPRESSIBLE_EXTENSIONS | CRITICAL_EXTENSIONS:
+        _EXT_CLASSES[_ext] = (_ext in COMPRESSIBLE_EXTENSIONS, _ext in CRITICAL_EXTENSIONS)
+    del _ext
     
-    def __init__(self):
-        """Initialize the smart storage engine."""
-        self.algorithm_cache = {}
+    # Compression levels: level 1 is several times faster than 6 for a few
+    # percent worse ratio, so only the "cost" policy pays for the higher level
+    FAST_COMPRESS_LEVEL = 1
+    RATIO_COMPRESS_LEVEL = 6
+    
+    # Policy names accepted by select_algorithm; anything else is balanced
+    _POLICY_ALIASES = {"cost": "cost", "eco": "eco", "economy": "eco"}
+    
+    _ECO_REASONING = "Eco policy: {algorithm} with compression for {filename}"
+    _BALANCED_REASONING = "Balanced: {algorithm} chosen for {filename} ({size} bytes)"
+    
+    # (policy, size >= 10MB) -> (algorithm, config template, reasoning format).
+    # Files under 10MB are replicated; larger ones use Reed-Solomon (3,2).
+    # Eco favors compression; "cost" also trades CPU for a better ratio.
+    _POLICY_TABLE = {
+        ("cost", False): ("replication",
+                          {"replication_factor": 3, "compress": True, "compress_level": RATIO_COMPRESS_LEVEL},
+                          _ECO_REASONING),
+        ("cost", True): ("reed-solomon",
+                         {"k": 3, "m": 2, "compress": True, "compress_level": RATIO_COMPRESS_LEVEL},
+                         _ECO_REASONING),
+        ("eco", False): ("replication",
+                         {"replication_factor": 3, "compress": True, "compress_level": FAST_COMPRESS_LEVEL},
+                         _ECO_REASONING),
+        ("eco", True): ("reed-solomon",
+                        {"k": 3, "m": 2, "compress": True, "compress_level": FAST_COMPRESS_LEVEL},
+                        _ECO_REASONING),
+        ("balanced", False): ("replication",
+                              {"replication_factor": 3, "compress": False, "compress_level": FAST_COMPRESS_LEVEL},
+                              _BALANCED_REASONING),
+        ("balanced", True): ("reed-solomon",
+                             {"k": 3, "m": 2, "compress": False, "compress_level": FAST_COMPRESS_LEVEL},
+                             _BALANCED_REASONING),
+    }
     
-    def analyze_file(self, filename: str) -> FileMetadata:
+    def analyze_file(self, filename: str, size: int = 0) -> FileMetadata:
         """
         Analyze file metadata to inform algorithm selection.
         
         Args:
             filename: Name of the file
+            size: File size in bytes
             
         Returns:
             FileMetadata object with analysis results
         """
         # Extract extension
-        extension = filename.split(".")[-1].lower() if "." in filename else ""
+        _, dot, extension = filename.rpartition(".")
+        extension = extension.lower() if dot else ""
         
-        # Determine if compressible
-        is_compressible = extension in self.COMPRESSIBLE_EXTENSIONS
-        
-        # Determine if critical
-        is_critical = extension in self.CRITICAL_EXTENSIONS
+        # Compressible / critical depend only on the extension
+        is_compressible, is_critical = self._EXT_CLASSES.get(extension, (False, False))
         
         return FileMetadata(
             filename=filename,
             extension=extension,
+            size=size,
             is_compressible=is_compressible,
             is_critical=is_critical,
             access_pattern="random"  # Default assumption
         )
     
-    def select_algorithm(self, metadata: FileMetadata, policy: str = "balanced") -> Dict[str, Any]:
+    def select_algorithm(self, metadata: FileMetadata, policy: str = "balanced") -> Decision:
         """
         Intelligently select storage algorithm based on file metadata and policy.
         
@@ -90,59 +166,19 @@ class SmartStorageEngine:
             policy: Selection policy ("cost"/"eco", "balanced")
             
         Returns:
-            Decision dict with algorithm, config, reasoning, and cost estimate
-        """
-        policy_key = (policy or "").lower()
-
-        # Map both "cost" and "eco" to the eco policy
-        if policy_key in ("eco", "cost", "economy"):
-            return self._select_eco(metadata)
-        else:  # balanced (default)
-            return self._select_balanced(metadata)
-
-    def _select_eco(self, metadata: FileMetadata) -> Dict[str, Any]:
-        """Select algorithm prioritizing storage economy (eco/cost policy).
-
-        Eco follows smart selection but favors compression to reduce
-        storage cost: small files -> replication+compress, medium/large
-        -> reed-solomon+compress.
+            Decision with algorithm, config, reasoning, and cost estimate
+            (readable like a dict)
         """
-        if metadata.size < 10_000_000:  # <10MB
-            algorithm = "replication"
-            config = {"replication_factor": 3, "compress": True}
-        else:
-            # For medium and large files, prefer Reed-Solomon with compression
-            algorithm = "reed-solomon"
-            # Always use (3,2) Reed-Solomon configuration
-            config = {"k": 3, "m": 2, "compress": True}
-
-        cost = self._estimate_cost(algorithm, metadata, compress=config.get("compress", False))
-        return {
-            "algorithm": algorithm,
-            "config": config,
-            "reasoning": f"Eco policy: {algorithm} with compression for {metadata.filename}",
-            "cost_estimate": cost,
-        }
-    
-    def _select_balanced(self, metadata: FileMetadata) -> Dict[str, Any]:
-        """Select algorithm balancing cost and reliability."""
-        # Small files: replication (simpler, lower overhead for small sizes)
-        if metadata.size < 10_000_000:  # < 10MB
-            algorithm = "replication"
-            config = {"replication_factor": 3, "compress": False}
-        # Medium and large files: Reed-Solomon (3,2) configuration
-        else:
-            algorithm = "reed-solomon"
-            config = {"k": 3, "m": 2, "compress": False}  # 1.67x overhead, can recover from 2 failures
-        
-        cost = self._estimate_cost(algorithm, metadata, compress=config.get("compress", False))
+        policy_key = self._POLICY_ALIASES.get((policy or "").lower(), "balanced")
+        algorithm, config, reasoning = self._POLICY_TABLE[(policy_key, metadata.size >= 10_000_000)]
         
-        return {
-            "algorithm": algorithm,
-            "config": config,
-            "reasoning": f"Balanced: {algorithm} chosen for {metadata.filename} ({metadata.size} bytes)",
-            "cost_estimate": cost,
-        }
+        return Decision(
+            algorithm=algorithm,
+            config=dict(config),  # callers may adjust their copy
+            cost_estimate=self._cost_for(algorithm, metadata.size > 1_000_000_000, config["compress"]),
+            metadata=metadata,
+            reasoning_format=reasoning,
+        )
     
     def _configure_algorithm(self, algorithm: str, metadata: FileMetadata) -> Dict[str, Any]:
         """
@@ -158,11 +194,13 @@ class SmartStorageEngine:
         if algorithm == "replication":
             # More replicas for critical files
             factor = 4 if metadata.is_critical else 3
-            return {"replication_factor": factor, "compress": bool(metadata.is_compressible)}
+            return {"replication_factor": factor, "compress": bool(metadata.is_compressible),
+                    "compress_level": self.FAST_COMPRESS_LEVEL}
         
         elif algorithm == "reed-solomon":
             # Always use (3,2) Reed-Solomon configuration
-            return {"k": 3, "m": 2, "compress": bool(metadata.is_compressible)}
+            return {"k": 3, "m": 2, "compress": bool(metadata.is_compressible),
+                    "compress_level": self.FAST_COMPRESS_LEVEL}
         
         # XOR-parity removed; unsupported algorithm will raise below
         
@@ -181,10 +219,16 @@ class SmartStorageEngine:
         Returns:
             Estimated cost (as a multiplier of base file size)
         """
-        base_cost = self.ALGORITHM_COSTS.get(algorithm, 1.0)
+        return self._cost_for(algorithm, metadata.size > 1_000_000_000, bool(compress))
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=64)
+    def _cost_for(algorithm: str, is_large: bool, compress: bool) -> float:
+        """Cost multiplier; depends only on (algorithm, size bucket, compress)."""
+        base_cost = SmartStorageEngine.ALGORITHM_COSTS.get(algorithm, 1.0)
         
         # Adjust based on file size (economies of scale for large files)
-        if metadata.size > 1_000_000_000:  # > 1GB
+        if is_large:  # > 1GB
             base_cost *= 0.9
         
         # Only apply compression discount if compression is actually being used
@@ -1,15 +1,103 @@
 import os
-from typing import List, Dict, Optional
+import json
+import functools
+import logging
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple, Union, BinaryIO
 from supabase import create_client, Client
 from dotenv import load_dotenv
 import httpx
-from datetime import datetime
+from datetime import datetime, timezone
 
 load_dotenv()
 
+log = logging.getLogger("cosmeon")
+
+# Shard bodies: bytes are sent as-is; bytearray/memoryview and open binary
+# files are streamed in chunks of this size so no full bytes copy is made
+ShardData = Union[bytes, bytearray, memoryview, BinaryIO]
+UPLOAD_STREAM_CHUNK = 1 << 20
+
+def _shard_size(shard_data: ShardData) -> int:
+    """Body length in bytes; for files, what remains from the current position"""
+    if isinstance(shard_data, (bytes, bytearray)):
+        return len(shard_data)
+    if isinstance(shard_data, memoryview):
+        return shard_data.nbytes
+    if hasattr(shard_data, "getbuffer"):
+        return shard_data.getbuffer().nbytes - shard_data.tell()
+    pos = shard_data.tell()
+    end = shard_data.seek(0, os.SEEK_END)
+    shard_data.seek(pos)
+    return end - pos
+
+async def _stream_shard(shard_data: ShardData):
+    """Yield a buffer or file body in UPLOAD_STREAM_CHUNK pieces"""
+    if isinstance(shard_data, (bytearray, memoryview)):
+        view = memoryview(shard_data).cast("B")
+        for start in range(0, view.nbytes, UPLOAD_STREAM_CHUNK):
+            yield bytes(view[start:start + UPLOAD_STREAM_CHUNK])
+    else:
+        while chunk := await asyncio.to_thread(shard_data.read, UPLOAD_STREAM_CHUNK):
+            yield chunk
+
+# Options for buckets created at startup
+_BUCKET_OPTIONS = {
+    "public": True,
+    "file_size_limit": 52428800,  # 50MB limit per file
+    "allowed_mime_types": ["image/*", "video/*", "application/*", "text/*"]
+}
+
+# Fields every normalized shard record carries, with their defaults
+_SHARD_DEFAULTS = {
+    "bucket": "",
+    "filename": "",
+    "url": "",
+    "size": 0,
+    "shard_index": 0,
+    "uploaded_at": ""
+}
+
+def _coerce_json(value, default, kind):
+    """Return value if it is a kind, else decode it from a JSON string, else default"""
+    if isinstance(value, kind):
+        return value
+    if isinstance(value, str):
+        try:
+            decoded = json.loads(value)
+        except ValueError:
+            return default
+        return decoded if isinstance(decoded, kind) else default
+    return default
+
+def with_admin_fallback(method):
+    """
+    Run a metadata method with the regular client, then once more with the
+    admin client if it raised or found nothing (e.g. rows hidden by RLS).
+    
+    The wrapped method takes the client to use as its first argument after
+    self; errors from the admin attempt propagate to the caller.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            result = method(self, self.client, *args, **kwargs)
+            if result:
+                return result
+        except Exception as e:
+            log.warning("%s failed, retrying with admin client: %s", method.__name__, e)
+        return method(self, self.admin_client, *args, **kwargs)
+    return wrapper
+
 class SupabaseStorageManager:
     """Manages file storage across Supabase buckets"""
     
+    # Seconds a get_bucket_status result is reused by pollers
+    BUCKET_STATUS_TTL = 5.0
+    
     def __init__(self):
         self.url = os.getenv("SUPABASE_URL")
         self.key = os.getenv("SUPABASE_KEY")
@@ -24,43 +112,92 @@ class SupabaseStorageManager:
         
         # Bucket configuration
         self.buckets = os.getenv("STORAGE_BUCKETS", "node-1,node-2,node-3,node-4,node-5").split(",")
+        self._buckets_tuple = tuple(self.buckets)  # index -> name
+        self._bucket_index = {b: i for i, b in enumerate(self.buckets)}  # name -> index
         
-        # Ensure buckets exist
-        self._initialize_buckets()
+        # Pooled async HTTP client for direct Storage API calls (created lazily)
+        self._aclient: Optional[httpx.AsyncClient] = None
+        self._status_cache: Optional[Tuple[float, Dict]] = None  # (timestamp, status)
+        
+        # Missing buckets are created lazily, before the first upload
+        self._buckets_initialized = False
+        self._init_lock = threading.Lock()
+    
+    def ensure_buckets(self):
+        """Create missing buckets once; failures are reported and retried on the next upload"""
+        if self._buckets_initialized:
+            return
+        with self._init_lock:
+            if self._buckets_initialized:
+                return
+            try:
+                self._initialize_buckets()
+                self._buckets_initialized = True
+            except Exception as e:
+                log.warning("Could not check buckets: %s", e, exc_info=True)
     
     def _initialize_buckets(self):
         """Create buckets if they don't exist"""
-        existing_buckets = self.client.storage.list_buckets()
-        existing_names = [b.name for b in existing_buckets]
+        existing_names = {b.name for b in self.client.storage.list_buckets()}
+        missing = [b for b in self.buckets if b not in existing_names]
+        if not missing:
+            return
         
-        for bucket_name in self.buckets:
-            if bucket_name not in existing_names:
-                print(f"Creating bucket: {bucket_name}")
-                try:
-                    # Note: Using admin client for bucket creation
-                    self.admin_client.storage.create_bucket(
-                        bucket_name,
-                        options={
-                            "public": True,
-                            "file_size_limit": 52428800,  # 50MB limit per file
-                            "allowed_mime_types": ["image/*", "video/*", "application/*", "text/*"]
-                        }
-                    )
-                    print(f"Created bucket: {bucket_name}")
-                except Exception as e:
-                    print(f"Could not create bucket {bucket_name}: {e}")
+        # Creations are independent: issue them concurrently
+        with ThreadPoolExecutor(max_workers=len(missing)) as ex:
+            list(ex.map(self._create_bucket, missing))
+    
+    def _create_bucket(self, bucket_name: str):
+        """Create a single bucket, reporting (not raising) failures"""
+        log.info("Creating bucket: %s", bucket_name)
+        try:
+            # Note: Using admin client for bucket creation
+            self.admin_client.storage.create_bucket(bucket_name, options=_BUCKET_OPTIONS)
+            log.info("Created bucket: %s", bucket_name)
+        except Exception as e:
+            log.warning("Could not create bucket %s: %s", bucket_name, e, exc_info=True)
 
-    def upload_shard(self, bucket_name: str, shard_data: bytes, 
-                    file_id: str, shard_index: int) -> Dict:
+    @staticmethod
+    def shard_prefix(file_id: str) -> str:
+        """Filename prefix shared by all shards of a file"""
+        return f"{file_id}_shard_"
+    
+    @staticmethod
+    def _batch_timestamp() -> str:
+        """UTC upload time shared by all shards of one upload"""
+        return datetime.now(timezone.utc).isoformat(timespec="seconds")
+    
+    def _shard_record(self, client: Client, bucket_name: str, filename: str,
+                      size: int, shard_index: int, uploaded_at: Optional[str] = None) -> Dict:
+        """Metadata stored for an uploaded shard"""
+        return {
+            "bucket": bucket_name,
+            "filename": filename,
+            "url": client.storage.from_(bucket_name).get_public_url(f"shards/{filename}"),
+            "size": size,
+            "uploaded_at": uploaded_at or self._batch_timestamp(),
+            "shard_index": shard_index
+        }
+    
+    def upload_shard(self, bucket_name: str, shard_data: ShardData, 
+                    file_id: str, shard_index: int, uploaded_at: Optional[str] = None,
+                    *, prefix: Optional[str] = None) -> Dict:
         """
         Upload a shard to specific bucket
         
         Returns: Dict with URL and metadata
         """
         # Generate unique filename
-        filename = f"{file_id}_shard_{shard_index:03d}.cosm"
+        filename = f"{prefix or self.shard_prefix(file_id)}{shard_index:03d}.cosm"
         filepath = f"shards/{filename}"
         
+        self.ensure_buckets()
+        
+        # The SDK treats anything but bytes or a file object as a path
+        if isinstance(shard_data, (bytearray, memoryview)):
+            shard_data = bytes(shard_data)
+        size = _shard_size(shard_data)
+        
         try:
             # Upload to Supabase Storage
             response = self.client.storage.from_(bucket_name).upload(
@@ -68,40 +205,110 @@ class SupabaseStorageManager:
                 shard_data,
                 file_options={"content-type": "application/octet-stream"}
             )
-            
-            # Get public URL
-            url = self.client.storage.from_(bucket_name).get_public_url(filepath)
-            
-            return {
-                "bucket": bucket_name,
-                "filename": filename,
-                "url": url,
-                "size": len(shard_data),
-                "uploaded_at": datetime.utcnow().isoformat(),
-                "shard_index": shard_index
-            }
+            return self._shard_record(self.client, bucket_name, filename, size, shard_index, uploaded_at)
             
         except Exception as e:
-            print(f"Error uploading to {bucket_name}: {e}")
+            log.warning("Error uploading to %s, retrying with admin credentials: %s", bucket_name, e)
             # Try with admin client if regular fails
             try:
                 response = self.admin_client.storage.from_(bucket_name).upload(
                     filepath,
                     shard_data
                 )
-                url = self.admin_client.storage.from_(bucket_name).get_public_url(filepath)
-                
-                return {
-                    "bucket": bucket_name,
-                    "filename": filename,
-                    "url": url,
-                    "size": len(shard_data),
-                    "uploaded_at": datetime.utcnow().isoformat(),
-                    "shard_index": shard_index
-                }
+                return self._shard_record(self.admin_client, bucket_name, filename, size, shard_index, uploaded_at)
+            except Exception as e2:
+                raise Exception(f"Failed to upload to {bucket_name}: {e2}")
+    
+    def _async_client(self) -> httpx.AsyncClient:
+        """Shared HTTP/2 keep-alive client; must be used from a single event loop"""
+        if self._aclient is None:
+            self._aclient = httpx.AsyncClient(
+                http2=True,
+                timeout=60.0,
+                limits=httpx.Limits(max_connections=64, max_keepalive_connections=32)
+            )
+        return self._aclient
+    
+    async def aclose(self):
+        """Close the pooled async client"""
+        if self._aclient is not None:
+            await self._aclient.aclose()
+            self._aclient = None
+    
+    async def _post_shard(self, key: str, bucket_name: str, filepath: str,
+                          shard_data: ShardData, size: int):
+        """Upload a raw shard body through the Storage REST API"""
+        headers = {
+            "apikey": key,
+            "Authorization": f"Bearer {key}",
+            "content-type": "application/octet-stream",
+            "x-upsert": "false"
+        }
+        if isinstance(shard_data, bytes):
+            content = shard_data
+        else:
+            # Streamed body; an explicit length avoids chunked transfer encoding
+            content = _stream_shard(shard_data)
+            headers["content-length"] = str(size)
+        
+        response = await self._async_client().post(
+            f"{self.url}/storage/v1/object/{bucket_name}/{filepath}",
+            content=content,
+            headers=headers
+        )
+        response.raise_for_status()
+    
+    async def upload_shard_async(self, bucket_name: str, shard_data: ShardData,
+                                 file_id: str, shard_index: int,
+                                 uploaded_at: Optional[str] = None,
+                                 *, prefix: Optional[str] = None) -> Dict:
+        """
+        Upload a shard over the pooled async client, retrying with the service key
+        
+        Returns: Dict with URL and metadata (same shape as upload_shard)
+        """
+        if not self._buckets_initialized:
+            await asyncio.to_thread(self.ensure_buckets)
+        
+        filename = f"{prefix or self.shard_prefix(file_id)}{shard_index:03d}.cosm"
+        filepath = f"shards/{filename}"
+        size = _shard_size(shard_data)
+        # File bodies are rewound here before the retry
+        start = None if isinstance(shard_data, (bytes, bytearray, memoryview)) else shard_data.tell()
+        
+        try:
+            await self._post_shard(self.key, bucket_name, filepath, shard_data, size)
+            return self._shard_record(self.client, bucket_name, filename, size, shard_index, uploaded_at)
+        except Exception as e:
+            log.warning("Error uploading to %s, retrying with admin credentials: %s", bucket_name, e)
+            try:
+                if start is not None:
+                    shard_data.seek(start)
+                await self._post_shard(self.service_key or self.key, bucket_name, filepath, shard_data, size)
+                return self._shard_record(self.admin_client, bucket_name, filename, size, shard_index, uploaded_at)
             except Exception as e2:
                 raise Exception(f"Failed to upload to {bucket_name}: {e2}")
     
+    async def upload_shards_many(self, items: List[Tuple[str, ShardData, str, int]]) -> List[Dict]:
+        """
+        Upload (bucket_name, shard_data, file_id, shard_index) items concurrently
+        
+        Returns: shard metadata in the order of items
+        """
+        if not self._buckets_initialized:
+            await asyncio.to_thread(self.ensure_buckets)
+        uploaded_at = self._batch_timestamp()
+        prefixes = {}  # file_id -> shard filename prefix, built once per file
+        uploads = []
+        for bucket_name, shard_data, file_id, shard_index in items:
+            prefix = prefixes.get(file_id)
+            if prefix is None:
+                prefix = prefixes[file_id] = self.shard_prefix(file_id)
+            uploads.append(self.upload_shard_async(
+                bucket_name, shard_data, file_id, shard_index, uploaded_at, prefix=prefix
+            ))
+        return list(await asyncio.gather(*uploads))
+    
     def download_shard(self, shard_url: str) -> bytes:
         """Download a shard from its URL"""
         try:
@@ -109,38 +316,109 @@ class SupabaseStorageManager:
             response.raise_for_status()
             return response.content
         except Exception as e:
-            print(f"Error downloading shard: {e}")
+            log.warning("Error downloading shard %s: %s", shard_url, e, exc_info=True)
             raise
     
+    async def download_shard_async(self, shard_url: str) -> bytes:
+        """Download a shard over the pooled async client"""
+        try:
+            response = await self._async_client().get(shard_url)
+            response.raise_for_status()
+            return response.content
+        except Exception as e:
+            log.warning("Error downloading shard %s: %s", shard_url, e, exc_info=True)
+            raise
+    
+    async def download_shards(self, shard_urls: List[str]) -> List[bytes]:
+        """Download several shards concurrently, in the order of shard_urls"""
+        return list(await asyncio.gather(*[self.download_shard_async(url) for url in shard_urls]))
+    
+    def list_shard_names(self, bucket_name: str, file_id: str, client: Optional[Client] = None) -> set:
+        """Names of a file's shards present in a bucket, using a single list call"""
+        prefix = self.shard_prefix(file_id)
+        files = (client or self.client).storage.from_(bucket_name).list(
+            path="shards",
+            options={"search": prefix, "limit": 1000}
+        )
+        names = set()
+        for f in files or []:
+            if isinstance(f, dict):
+                name = f.get("name")
+            else:
+                name = getattr(f, "name", f)
+            if isinstance(name, str) and name.startswith(prefix):
+                names.add(name)
+        return names
+    
+    async def probe_shards(self, file_id: str, shards: List[Dict]) -> Dict[Tuple[str, str], bool]:
+        """
+        Check which shards exist with at most one list call per distinct bucket
+        
+        Returns: Dict mapping (bucket, filename) -> True for shards the listing
+        returned. Shards missing from a listing, or in buckets whose listing
+        failed, are left out so the caller can probe them directly (listings
+        made with the anon key may hide rows that are still publicly readable).
+        """
+        buckets = list(dict.fromkeys(s.get("bucket", "") for s in shards if s.get("filename")))
+        listings = await asyncio.gather(
+            *[asyncio.to_thread(self.list_shard_names, b, file_id) for b in buckets],
+            return_exceptions=True
+        )
+        listed = {b: names for b, names in zip(buckets, listings) if not isinstance(names, BaseException)}
+        
+        result = {}
+        for shard in shards:
+            bucket, filename = shard.get("bucket", ""), shard.get("filename")
+            if filename and bucket in listed and filename in listed[bucket]:
+                result[(bucket, filename)] = True
+        return result
+    
     def delete_shard(self, bucket_name: str, filepath: str):
         """Delete a shard from storage"""
         try:
             self.client.storage.from_(bucket_name).remove([filepath])
             return True
         except Exception as e:
-            print(f"Error deleting shard: {e}")
+            log.warning("Error deleting shard %s from %s: %s", filepath, bucket_name, e, exc_info=True)
+            return False
+    
+    def delete_shards(self, bucket_name: str, filepaths: List[str]) -> bool:
+        """Delete several shards from one bucket in a single request"""
+        try:
+            self.client.storage.from_(bucket_name).remove(filepaths)
+            return True
+        except Exception as e:
+            log.warning("Error deleting shards from %s: %s", bucket_name, e, exc_info=True)
             return False
     
+    def _bucket_status(self, bucket_name: str) -> Dict:
+        """Check a single bucket by listing it"""
+        try:
+            # Try to list files to check if bucket is accessible
+            files = self.client.storage.from_(bucket_name).list()
+            return {
+                "status": "online",
+                "file_count": len(files),
+                "capacity": "unknown"  # Supabase doesn't expose this
+            }
+        except Exception as e:
+            return {
+                "status": "offline",
+                "error": str(e),
+                "file_count": 0
+            }
+    
     def get_bucket_status(self) -> Dict:
-        """Check status of all buckets"""
-        status = {}
+        """Check status of all buckets (cached for BUCKET_STATUS_TTL seconds)"""
+        cached = self._status_cache
+        if cached and time.monotonic() - cached[0] < self.BUCKET_STATUS_TTL:
+            return cached[1]
         
-        for bucket_name in self.buckets:
-            try:
-                # Try to list files to check if bucket is accessible
-                files = self.client.storage.from_(bucket_name).list()
-                status[bucket_name] = {
-                    "status": "online",
-                    "file_count": len(files),
-                    "capacity": "unknown"  # Supabase doesn't expose this
-                }
-            except Exception as e:
-                status[bucket_name] = {
-                    "status": "offline",
-                    "error": str(e),
-                    "file_count": 0
-                }
+        # Buckets are independent: list them all concurrently
+        with ThreadPoolExecutor(max_workers=max(1, len(self.buckets))) as ex:
+            status = dict(zip(self.buckets, ex.map(self._bucket_status, self.buckets)))
         
+        self._status_cache = (time.monotonic(), status)
         return status
     
     def store_metadata(self, file_id: str, metadata: Dict) -> bool:
@@ -159,157 +437,87 @@ class SupabaseStorageManager:
             self.client.table("files").insert(data).execute()
             return True
         except Exception as e:
-            print(f"Error storing metadata: {e}")
+            log.warning("Error storing metadata for %s: %s", file_id, e, exc_info=True)
             return False
     
-    def get_metadata(self, file_id: str) -> Optional[Dict]:
+    @with_admin_fallback
+    def get_metadata(self, client: Client, file_id: str) -> Optional[Dict]:
         """Retrieve file metadata from database"""
-        try:
-            response = self.client.table("files").select("*").eq("id", file_id).execute()
-            if response.data:
-                return response.data[0]
-        except Exception:
-            pass
-        
-        # Try admin client if regular client fails
-        try:
-            response = self.admin_client.table("files").select("*").eq("id", file_id).execute()
-            if response.data:
-                return response.data[0]
-        except Exception:
-            pass
-        
-        return None
+        response = client.table("files").select("*").eq("id", file_id).execute()
+        return response.data[0] if response.data else None
+
+    def get_metadata_many(self, file_ids: List[str]) -> Dict[str, Dict]:
+        """Retrieve metadata for several files in one query; returns id -> record"""
+        if not file_ids:
+            return {}
+        return self._get_metadata_many(file_ids)
+    
+    @with_admin_fallback
+    def _get_metadata_many(self, client: Client, file_ids: List[str]) -> Dict[str, Dict]:
+        response = client.table("files").select("*").in_("id", file_ids).execute()
+        return {rec["id"]: rec for rec in response.data or []}
 
-    def list_files_metadata(self) -> List[Dict]:
+    @with_admin_fallback
+    def list_files_metadata(self, client: Client) -> List[Dict]:
         """Fetch all file metadata from the database"""
-        try:
-            response = self.client.table("files").select("*").execute()
-            if response.data:
-                return self._normalize_file_records(response.data)
-        except Exception:
-            pass
-        
-        # Try admin client if regular client fails
-        try:
-            response = self.admin_client.table("files").select("*").execute()
-            if response.data:
-                return self._normalize_file_records(response.data)
-        except Exception:
-            pass
-        
-        return []
+        response = client.table("files").select("*").execute()
+        return self._normalize_file_records(response.data or [])
     
     def _normalize_file_records(self, records: List[Dict]) -> List[Dict]:
         """Normalize file records to consistent format"""
         normalized = []
         for rec in records:
-            algo = rec.get("algorithm") or rec.get("algorithm_used")
-            
-            # Handle config data - it might be stored as JSON string
-            cfg = rec.get("config") or rec.get("algorithm_config") or {}
-            if isinstance(cfg, str):
-                try:
-                    import json
-                    cfg = json.loads(cfg)
-                except:
-                    cfg = {}
-            elif not isinstance(cfg, dict):
-                cfg = {}
+            rget = rec.get  # bound once per record
+            algo = rget("algorithm") or rget("algorithm_used")
             
-            # Handle shards data - it might be stored as JSON string
-            shards = rec.get("shards") or []
-            if isinstance(shards, str):
-                try:
-                    import json
-                    shards = json.loads(shards)
-                except:
-                    shards = []
-            elif not isinstance(shards, list):
-                shards = []
+            # Config and shards might be stored as JSON strings
+            cfg = _coerce_json(rget("config") or rget("algorithm_config") or {}, {}, dict)
+            shards = _coerce_json(rget("shards") or [], [], list)
             
             # Ensure each shard has the required fields
-            processed_shards = []
-            for shard in shards:
-                if isinstance(shard, dict):
-                    processed_shards.append({
-                        "bucket": shard.get("bucket", ""),
-                        "filename": shard.get("filename", ""),
-                        "url": shard.get("url", ""),
-                        "size": shard.get("size", 0),
-                        "shard_index": shard.get("shard_index", 0),
-                        "uploaded_at": shard.get("uploaded_at", "")
-                    })
+            processed_shards = [_SHARD_DEFAULTS | shard for shard in shards if isinstance(shard, dict)]
             
             normalized.append({
-                "id": rec.get("id"),
-                "filename": rec.get("filename") or rec.get("id"),
-                "original_size": rec.get("original_size") or rec.get("size") or 0,
+                "id": rget("id"),
+                "filename": rget("filename") or rget("id"),
+                "original_size": rget("original_size") or rget("size") or 0,
                 "algorithm": algo,
                 "config": cfg,
                 "shards": processed_shards,
-                "cost_estimate": rec.get("cost_estimate"),
-                "uploaded_at": rec.get("created_at") or rec.get("uploaded_at")
+                "cost_estimate": rget("cost_estimate"),
+                "uploaded_at": rget("created_at") or rget("uploaded_at")
             })
         return normalized
 
-    def delete_metadata(self, file_id: str):
+    @with_admin_fallback
+    def delete_metadata(self, client: Client, file_id: str) -> bool:
         """Delete file metadata from the database"""
-        try:
-            self.client.table("files").delete().eq("id", file_id).execute()
-        except Exception as e:
-            # Try admin client if regular client fails
-            try:
-                self.admin_client.table("files").delete().eq("id", file_id).execute()
-            except Exception as e2:
-                raise Exception(f"Failed to delete metadata: {e2}")
+        client.table("files").delete().eq("id", file_id).execute()
+        return True
+
+    def _delete_file_shards_in(self, client: Client, bucket: str, file_id: str) -> int:
+        """List one bucket and remove the shards belonging to file_id. Returns number deleted."""
+        # Server-side prefix search returns only this file's shards
+        targets = [f"shards/{name}" for name in self.list_shard_names(bucket, file_id, client)]
+        if targets:
+            # remove expects list of paths relative to bucket root
+            client.storage.from_(bucket).remove(targets)
+        return len(targets)
 
     def delete_shards_by_file_id(self, file_id: str) -> int:
         """Delete all shards across buckets matching a given file_id. Returns number deleted."""
-        deleted = 0
-        for bucket in self.buckets:
+        def _delete_one(bucket: str) -> int:
             try:
-                # list files under shards/ and delete those that match the file_id prefix
-                files = self.client.storage.from_(bucket).list(path="shards")
-                if not files:
-                    files = self.client.storage.from_(bucket).list()
-                # files may be list of objects with 'name' or simple strings depending on SDK
-                names = []
-                for f in files:
-                    if isinstance(f, dict) and f.get("name"):
-                        names.append(f.get("name"))
-                    elif hasattr(f, "name"):
-                        names.append(getattr(f, "name"))
-                    elif isinstance(f, str):
-                        names.append(f)
-
-                targets = [n for n in names if n.startswith(f"{file_id}_shard_")]
-                # Prepend path if the list returns base names
-                targets = ["shards/" + t if not t.startswith("shards/") else t for t in targets]
-                if targets:
-                    # remove expects list of paths relative to bucket root
-                    self.client.storage.from_(bucket).remove(targets)
-                    deleted += len(targets)
+                return self._delete_file_shards_in(self.client, bucket, file_id)
             except Exception as e:
-                print(f"Error while deleting shards in {bucket}: {e}")
+                log.warning("Error while deleting shards in %s, retrying with admin client: %s", bucket, e)
                 # try admin client fallback
                 try:
-                    files = self.admin_client.storage.from_(bucket).list(path="shards")
-                    if not files:
-                        files = self.admin_client.storage.from_(bucket).list()
-                    names = []
-                    for f in files:
-                        if isinstance(f, dict) and f.get("name"):
-                            names.append(f.get("name"))
-                        elif hasattr(f, "name"):
-                            names.append(getattr(f, "name"))
-                        elif isinstance(f, str):
-                            names.append(f)
-                    targets = [n for n in names if n.startswith(f"{file_id}_shard_")]
-                    targets = ["shards/" + t if not t.startswith("shards/") else t for t in targets]
-                    if targets:
-                        self.admin_client.storage.from_(bucket).remove(targets)
-                        deleted += len(targets)
+                    return self._delete_file_shards_in(self.admin_client, bucket, file_id)
                 except Exception as e2:
-                    print(f"Admin fallback failed for {bucket}: {e2}")
-        return deleted
\ No newline at end of file
+                    log.warning("Admin fallback failed for %s: %s", bucket, e2, exc_info=True)
+                    return 0
+
+        # Buckets are independent: list+remove them all concurrently
+        with ThreadPoolExecutor(max_workers=max(1, len(self.buckets))) as ex:
+            return sum(ex.map(_delete_one, self.buckets))